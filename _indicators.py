@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    prange = range
+
+    # Fall back to plain Python if numba is not installed
+    def njit(**kwargs):
+        return lambda f: f
+
+
+@njit(cache=True)
+def _sma_rsi(close, w1=50, w2=200, wr=14):
+    """
+    Computes two simple moving averages and Wilder's RSI in a single pass over the close prices.
+    """
+    n = close.shape[0]
+    sma1 = np.full(n, np.nan)
+    sma2 = np.full(n, np.nan)
+    rsi = np.full(n, np.nan)
+
+    sum1 = 0.0
+    sum2 = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    alpha = 1.0 / wr
+
+    for i in range(n):
+        # Running sums for the moving averages
+        sum1 += close[i]
+        sum2 += close[i]
+        if i >= w1:
+            sum1 -= close[i - w1]
+        if i >= w2:
+            sum2 -= close[i - w2]
+        if i >= w1 - 1:
+            sma1[i] = sum1 / w1
+        if i >= w2 - 1:
+            sma2[i] = sum2 / w2
+
+        # Wilder's recursive smoothing of gains and losses
+        if i == 0:
+            continue
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if i == 1:
+            avg_gain = gain
+            avg_loss = loss
+        else:
+            avg_gain += alpha * (gain - avg_gain)
+            avg_loss += alpha * (loss - avg_loss)
+        if i >= wr:
+            if avg_loss > 0:
+                rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            elif avg_gain > 0:
+                rsi[i] = 100.0
+
+    return sma1, sma2, rsi
+
+
+@njit(parallel=True, cache=True)
+def _sma_rsi_2d(close, w1=50, w2=200, wr=14):
+    """
+    Runs _sma_rsi over each column of a (bars, symbols) array in parallel.
+    Columns may be padded with leading NaNs when histories differ in length.
+    """
+    n, m = close.shape
+    sma1 = np.full((n, m), np.nan)
+    sma2 = np.full((n, m), np.nan)
+    rsi = np.full((n, m), np.nan)
+    for j in prange(m):
+        start = 0
+        while start < n and np.isnan(close[start, j]):
+            start += 1
+        if start == n:
+            continue
+        col_sma1, col_sma2, col_rsi = _sma_rsi(close[start:, j], w1, w2, wr)
+        sma1[start:, j] = col_sma1
+        sma2[start:, j] = col_sma2
+        rsi[start:, j] = col_rsi
+    return sma1, sma2, rsi
+
+
+def _sma_rsi_2d_numpy(close, w1=50, w2=200, wr=14):
+    """
+    Vectorized equivalent of _sma_rsi_2d, used when numba is not installed.
+    """
+    n, m = close.shape
+    valid = ~np.isnan(close)
+    zero = np.zeros((1, m))
+    cumsum = np.concatenate((zero, np.cumsum(np.where(valid, close, 0.0), axis=0)))
+    count = np.concatenate((zero, np.cumsum(valid, axis=0)))
+
+    def sma(window):
+        out = np.full((n, m), np.nan)
+        if n >= window:
+            # Only windows made up entirely of real bars get a value
+            full = (count[window:] - count[:-window]) == window
+            out[window - 1:] = np.where(full, (cumsum[window:] - cumsum[:-window]) / window, np.nan)
+        return out
+
+    # Split price changes into gains and losses on the raw arrays
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+    avg_gain = pd.DataFrame(gain).ewm(alpha=1 / wr, adjust=False, min_periods=wr).mean().to_numpy()
+    avg_loss = pd.DataFrame(loss).ewm(alpha=1 / wr, adjust=False, min_periods=wr).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    return sma(w1), sma(w2), rsi
+
+
+def sma_rsi_2d(close, w1=50, w2=200, wr=14):
+    """
+    Computes two simple moving averages and Wilder's RSI for each column of a (bars, symbols) array,
+    using the compiled kernel when available.
+    """
+    if HAVE_NUMBA:
+        return _sma_rsi_2d(close, w1, w2, wr)
+    return _sma_rsi_2d_numpy(close, w1, w2, wr)
+
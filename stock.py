@@ -1,33 +1,117 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import requests
+import pyarrow as pa
+import pyarrow.compute as pc
+import numpy as np
+from filelock import FileLock
+import httpx
 import io
+import json
+import tempfile
+import time
+from pathlib import Path
+import os
+from datetime import datetime, timezone
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from _indicators import sma_rsi_2d
+from stock_fetch import USER_AGENT, download_histories, fetch_quote_summaries, get_stock_data
+
+try:
+    import redis
+except ImportError:
+    redis = None
 
 # Set the page configuration for the Streamlit app
 st.set_page_config(layout="wide", page_title="Indian Stock Market Analyzer")
 
+RESPONSE_CACHE_DIR = Path(".cache") / "responses"
+
+def read_disk_cache(name, max_age):
+    """
+    Reads a value persisted by write_disk_cache.
+    Returns None if it is missing, unreadable or older than max_age seconds.
+    """
+    path = RESPONSE_CACHE_DIR / f"{name}.json"
+    try:
+        if time.time() - path.stat().st_mtime > max_age:
+            return None
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+def write_disk_cache(name, value):
+    """Persists a JSON-serializable value to disk so that it survives app restarts."""
+    try:
+        RESPONSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a unique temporary file first so readers never see a partial file
+        with tempfile.NamedTemporaryFile('w', dir=RESPONSE_CACHE_DIR, suffix=".tmp", delete=False) as f:
+            json.dump(value, f)
+        Path(f.name).replace(RESPONSE_CACHE_DIR / f"{name}.json")
+    except (OSError, TypeError, ValueError):
+        # The disk cache is best-effort
+        pass
+
+@st.cache_resource # Share one connection pool across reruns
+def get_http_client():
+    """
+    Creates a pooled HTTP/2 client for the NSE requests, so connections are reused.
+    """
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    return httpx.Client(http2=True, timeout=10, limits=limits, headers={'User-Agent': USER_AGENT}, follow_redirects=True)
+
+http_client = get_http_client()
+
 st.title("Indian Stock Market Analyzer 📈")
 st.write("This tool analyzes Nifty 50 stocks to identify top performers based on common investment strategies. Select a strategy and click 'Run Analysis' to begin.")
 
+NIFTY50_CSV_PATH = Path(".cache") / "ind_nifty50list.csv"
+NIFTY50_META_PATH = Path(".cache") / "ind_nifty50list.csv.meta" # Stores the Last-Modified header
+
 @st.cache_data(ttl=3600) # Cache the data for 1 hour to avoid re-downloading
 def get_nifty50_symbols():
     """
     Fetches the list of Nifty 50 stock symbols from the NSE India website.
-    Includes a fallback list in case the download fails.
+    The CSV is kept on disk and only re-downloaded when NSE reports it has changed.
+    Falls back to the last downloaded CSV, then to a default list, if the download fails.
     """
     try:
         url = "https://archives.nseindia.com/content/indices/ind_nifty50list.csv"
-        # Use a user-agent to avoid being blocked
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status() # Raise an exception for bad status codes
-        csv_file = io.StringIO(response.text)
+        headers = {}
+        NIFTY50_CSV_PATH.parent.mkdir(exist_ok=True)
+        # Lock so that multiple workers don't write the cached CSV at the same time
+        with FileLock(f"{NIFTY50_CSV_PATH}.lock"):
+            if NIFTY50_CSV_PATH.exists() and NIFTY50_META_PATH.exists():
+                headers['If-Modified-Since'] = NIFTY50_META_PATH.read_text().strip()
+            response = http_client.get(url, headers=headers)
+            if response.status_code == 304:
+                # Index composition is unchanged, reuse the cached CSV
+                csv_text = NIFTY50_CSV_PATH.read_text()
+            else:
+                response.raise_for_status() # Raise an exception for bad status codes
+                csv_text = response.text
+                NIFTY50_CSV_PATH.write_text(csv_text)
+                last_modified = response.headers.get('Last-Modified')
+                if last_modified:
+                    NIFTY50_META_PATH.write_text(last_modified)
+                else:
+                    NIFTY50_META_PATH.unlink(missing_ok=True)
+        csv_file = io.StringIO(csv_text)
         nifty50_df = pd.read_csv(csv_file)
         symbols = nifty50_df['Symbol'].tolist()
         # Append '.NS' for compatibility with yfinance
         return [symbol + ".NS" for symbol in symbols]
     except Exception as e:
+        # Prefer the last downloaded CSV over the short default list
+        try:
+            with FileLock(f"{NIFTY50_CSV_PATH}.lock"):
+                symbols = pd.read_csv(NIFTY50_CSV_PATH)['Symbol'].tolist()
+            st.warning(f"Could not download Nifty 50 list from NSE. Using the last downloaded list. Error: {e}")
+            return [symbol + ".NS" for symbol in symbols]
+        except Exception:
+            pass
         st.error(f"Could not download Nifty 50 list from NSE. Using a default list. Error: {e}")
         # Fallback list of major Nifty 50 stocks
         return [
@@ -36,59 +120,281 @@ def get_nifty50_symbols():
             'BAJFINANCE.NS', 'HCLTECH.NS', 'KOTAKBANK.NS', 'MARUTI.NS', 'ASIANPAINT.NS'
         ]
 
-def calculate_technical_indicators(df):
-    """Calculates technical indicators like SMA and RSI."""
-    if df.empty:
-        return df
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-    df['SMA_200'] = df['Close'].rolling(window=200).mean()
-    
-    # Calculate RSI
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    return df
-
-@st.cache_data(ttl=600) # Cache each stock's data for 10 minutes
-def get_stock_data(symbol):
+def calculate_technical_indicators_batch(histories):
     """
-    Fetches fundamental and technical data for a given stock symbol.
+    Calculates technical indicators for several price histories at once, adding them in place.
     """
+    frames = [df for df in histories if not df.empty]
+    if not frames:
+        return
+    n_bars = max(len(df) for df in frames)
+    # Right-align the closes so every column ends on its latest bar
+    close = np.full((n_bars, len(frames)), np.nan)
+    for j, df in enumerate(frames):
+        close[n_bars - len(df):, j] = df['Close'].to_numpy(dtype=np.float64)
+    sma_50, sma_200, rsi = sma_rsi_2d(close)
+    for j, df in enumerate(frames):
+        rows = slice(n_bars - len(df), n_bars)
+        df['SMA_50'] = sma_50[rows, j]
+        df['SMA_200'] = sma_200[rows, j]
+        df['RSI'] = rsi[rows, j]
+
+@st.cache_data(ttl=600) # Cache the price history for 10 minutes
+def get_all_histories(symbols):
+    """
+    Fetches one year of price history for all symbols in a single batched download.
+    """
+    return download_histories(symbols)
+
+HISTORY_CACHE_DIR = Path(".cache") / "history"
+
+@st.cache_resource # Runs once per server process
+def prune_history_cache(max_age_days=7):
+    """
+    Deletes cached price histories older than max_age_days, and temporary files
+    left behind by writes that were interrupted more than an hour ago.
+    """
+    HISTORY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    for pattern, max_age in (("*.parquet", max_age_days * 86400), ("*.tmp", 3600)):
+        for path in HISTORY_CACHE_DIR.glob(pattern):
+            try:
+                if now - path.stat().st_mtime > max_age:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                # Another worker removed or replaced the file meanwhile
+                pass
+
+def history_cache_path(symbol):
+    """Returns the on-disk location of a symbol's price history for the current UTC day."""
+    return HISTORY_CACHE_DIR / f"{symbol}_{datetime.now(timezone.utc).date()}.parquet"
+
+def is_history_cached(symbol):
+    """Checks whether today's price history for a symbol is already on disk."""
+    return history_cache_path(symbol).exists()
+
+@st.cache_resource(ttl=86400) # Keep each day's history in memory without re-hashing it, for at most a day
+def read_cached_history(path):
+    """Reads a price history from the on-disk Parquet cache."""
+    return pd.read_parquet(path)
+
+def get_symbol_history(bulk_history, symbol):
+    """
+    Returns the price history of a single symbol from today's on-disk cache,
+    or slices it out of the batched download and saves it to the cache.
+    """
+    path = history_cache_path(symbol)
+    if path.exists():
+        try:
+            # Copy so that adding indicators doesn't modify the shared cached frame
+            return read_cached_history(path).copy()
+        except Exception:
+            # An unreadable file is a cache miss: drop it and download the symbol on its own
+            path.unlink(missing_ok=True)
+            try:
+                bulk_history = get_all_histories([symbol])
+            except Exception:
+                return pd.DataFrame()
     try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
-        
-        # Fetch historical data for technical analysis
-        hist = stock.history(period="1y")
-        if hist.empty:
-            return None, None
+        hist = bulk_history[symbol].dropna().copy()
+    except (KeyError, TypeError):
+        return pd.DataFrame()
+    if not hist.empty:
+        # Write to a unique temporary file first so other workers never read a partial file
+        with tempfile.NamedTemporaryFile(dir=HISTORY_CACHE_DIR, suffix=".tmp", delete=False) as f:
+            hist.to_parquet(f)
+        Path(f.name).replace(path)
+    return hist
 
-        # Calculate technical indicators
-        hist_with_indicators = calculate_technical_indicators(hist)
-        
-        # Prepare a dictionary with relevant data
-        data = {
-            'Symbol': symbol.replace('.NS', ''),
-            'Company Name': info.get('longName', 'N/A'),
-            'Current Price': info.get('currentPrice', 0),
-            'P/E Ratio': info.get('trailingPE', None),
-            'P/B Ratio': info.get('priceToBook', None),
-            'Debt to Equity': info.get('debtToEquity', None),
-            'ROE': info.get('returnOnEquity', None),
-            'Revenue Growth': info.get('revenueGrowth', None),
-            '52 Week High': info.get('fiftyTwoWeekHigh', 0),
-            '52 Week Low': info.get('fiftyTwoWeekLow', 0),
-            'Market Cap': info.get('marketCap', 0),
-            'SMA_50': hist_with_indicators['SMA_50'].iloc[-1] if not hist_with_indicators.empty else None,
-            'SMA_200': hist_with_indicators['SMA_200'].iloc[-1] if not hist_with_indicators.empty else None,
-            'RSI': hist_with_indicators['RSI'].iloc[-1] if not hist_with_indicators.empty else None,
-        }
-        return data, hist_with_indicators
+prune_history_cache()
+
+def fetch_stock_infos(symbols):
+    """
+    Fetches the fundamental data for the given stock symbols, returned as {symbol: info}.
+    Results are kept on disk for an hour so they survive app restarts.
+    Symbols whose fetch failed are left out.
+    """
+    infos = {}
+    missing = []
+    for symbol in symbols:
+        info = read_disk_cache(f"info_{symbol}", 3600)
+        if info is None:
+            missing.append(symbol)
+        else:
+            infos[symbol] = info
+    if missing:
+        for symbol, info in asyncio.run(fetch_quote_summaries(missing)).items():
+            if info is not None:
+                write_disk_cache(f"info_{symbol}", info)
+                infos[symbol] = info
+    return infos
+
+@st.cache_data(ttl=600) # Cache the fundamental data for 10 minutes
+def get_cached_stock_infos(symbols):
+    """
+    Cached fetch_stock_infos. Raises if no symbol could be fetched, so a failed fetch is not cached.
+    """
+    infos = fetch_stock_infos(symbols)
+    if not infos:
+        raise RuntimeError("Could not fetch fundamental data for any symbol")
+    return infos
+
+def get_stock_infos(symbols):
+    """
+    Returns the fundamental data for the given stock symbols from the cache.
+    Symbols missing from the cached result are requested again on every call.
+    """
+    infos = dict(get_cached_stock_infos(symbols))
+    failed = [symbol for symbol in symbols if symbol not in infos]
+    if failed:
+        infos.update(fetch_stock_infos(failed))
+    return infos
+
+# How long to wait before trying to reach an unreachable Redis server again
+REDIS_RETRY_SECONDS = 30
+
+@st.cache_resource # Share one Redis connection across reruns
+def connect_redis():
+    """
+    Connects to the shared Redis cache used across app replicas.
+    Raises if the server is unreachable, so that the failure is not cached.
+    """
+    # Bound every command too, so a stalled server can't hang a run
+    client = redis.Redis(host=os.getenv("REDIS_HOST", "localhost"), socket_connect_timeout=1, socket_timeout=2)
+    client.ping()
+    return client
+
+@st.cache_resource # Kept across reruns so an unreachable server isn't retried on every call
+def redis_retry_state():
+    """Holds the earliest time at which to try connecting to Redis again."""
+    return {'next_attempt': 0.0}
+
+def get_redis_client():
+    """
+    Returns the shared Redis client, or None if redis is not installed or the server is unreachable.
+    After a failed connection, the next attempt is made REDIS_RETRY_SECONDS later.
+    """
+    if redis is None:
+        return None
+    state = redis_retry_state()
+    if time.time() < state['next_attempt']:
+        return None
+    try:
+        return connect_redis()
+    except redis.RedisError:
+        state['next_attempt'] = time.time() + REDIS_RETRY_SECONDS
+        return None
+
+def read_shared_stock_data(symbol, stale=False):
+    """
+    Reads a stock's data and history from the shared Redis cache.
+    With stale=True, returns the last stored value even if it has expired.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None, None
+    key = f"stock:{symbol}:stale" if stale else f"stock:{symbol}"
+    try:
+        cached = client.hgetall(key)
+    except redis.RedisError:
+        return None, None
+    if not cached:
+        return None, None
+    try:
+        data = json.loads(cached[b'data'])
+        hist = pd.read_parquet(io.BytesIO(cached[b'history']))
     except Exception:
-        # Return None if there's any issue fetching data for a symbol
+        # Drop entries that can't be decoded so they don't fail every run
+        try:
+            client.delete(key)
+        except redis.RedisError:
+            pass
         return None, None
+    return data, hist
+
+def write_shared_stock_data(symbol, data, hist):
+    """Stores a stock's data and history in the shared Redis cache."""
+    client = get_redis_client()
+    if client is None:
+        return
+    buf = io.BytesIO()
+    hist.to_parquet(buf)
+    # JSON rather than pickle, so that reading from the shared server can't execute code
+    payload = {'data': json.dumps(data), 'history': buf.getvalue()}
+    try:
+        pipe = client.pipeline()
+        for key in (f"stock:{symbol}", f"stock:{symbol}:stale"):
+            # Replace rather than update, in case the key holds an entry in an older format
+            pipe.delete(key)
+            pipe.hset(key, mapping=payload)
+        pipe.expire(f"stock:{symbol}", 600) # Fresh for 10 minutes, like get_cached_stock_infos
+        pipe.execute() # The stale key doesn't expire and is kept as a fallback if Yahoo is unavailable
+    except redis.RedisError:
+        pass
+
+TEXT_COLUMNS = ['Symbol', 'Company Name']
+NUMERIC_COLUMNS = ['Current Price', 'P/E Ratio', 'P/B Ratio', 'Debt to Equity', 'ROE', 'Revenue Growth', '52 Week High', '52 Week Low', 'Market Cap', 'SMA_50', 'SMA_200', 'RSI']
+
+def allocate_columns(n):
+    """Pre-allocates one array per result column for n stocks."""
+    columns = {col: np.empty(n, dtype=object) for col in TEXT_COLUMNS}
+    columns.update({col: np.full(n, np.nan) for col in NUMERIC_COLUMNS})
+    return columns
+
+def fill_row(columns, i, data):
+    """Writes a stock's data into row i of the pre-allocated column arrays."""
+    for col in TEXT_COLUMNS:
+        columns[col][i] = data.get(col)
+    for col in NUMERIC_COLUMNS:
+        try:
+            columns[col][i] = float(data.get(col))
+        except (TypeError, ValueError):
+            # Leave missing or non-numeric values as NaN
+            pass
+
+# printf-style formatting has no thousands separator, so this one is applied as a ufunc
+format_thousands = np.frompyfunc('{:,.2f}'.format, 1, 1)
+
+TOP_N = 15 # Number of stocks shown in the results
+
+def select_top(table, mask, sort_col, ascending, k=TOP_N):
+    """
+    Selects the top k rows of the Arrow table where mask is True, ordered by sort_col.
+    Only the selected rows are converted to a DataFrame.
+    """
+    filtered = table.filter(mask) # Rows where the mask is null (missing values) are dropped
+    # Partial sort: picks the k best rows without sorting the rest
+    order = pc.select_k_unstable(filtered, k, sort_keys=[(sort_col, 'ascending' if ascending else 'descending')])
+    return filtered.take(order).to_pandas()
+
+def prewarm():
+    """Fetches the data for the first analysis run so that it is served from the cache."""
+    # Trigger the JIT compile of the indicator kernel so the first run doesn't pay for it
+    sma_rsi_2d(np.ones((1, 1)))
+    symbols = get_nifty50_symbols()
+    symbols_to_fetch = [symbol for symbol in symbols if read_shared_stock_data(symbol)[0] is None]
+    if symbols_to_fetch:
+        try:
+            get_stock_infos(symbols_to_fetch)
+        except Exception:
+            # The analysis run retries the fetch itself
+            pass
+        symbols_to_download = [symbol for symbol in symbols_to_fetch if not is_history_cached(symbol)]
+        if symbols_to_download:
+            try:
+                get_all_histories(symbols_to_download)
+            except Exception:
+                # The analysis run retries the download itself
+                pass
+
+@st.cache_resource # Start the prewarm only once per server process
+def start_prewarm():
+    """Runs prewarm in a background thread."""
+    thread = threading.Thread(target=prewarm, daemon=True)
+    thread.start()
+    return thread
+
+start_prewarm()
 
 # --- UI Elements ---
 st.sidebar.header("Analysis Controls")
@@ -111,35 +417,92 @@ if 'analysis_run' not in st.session_state:
     st.session_state.analysis_run = False
     st.session_state.results = None
     st.session_state.quality_params = {}
+    st.session_state.histories = {}
 
 
 # --- Analysis Logic ---
 if run_button:
+    # Wait for a prewarm still in flight, so its fetches are reused instead of sent to Yahoo a second time
+    prewarm_thread = start_prewarm()
+    if prewarm_thread.is_alive():
+        with st.spinner("Finishing the startup data fetch..."):
+            prewarm_thread.join()
     symbols = get_nifty50_symbols()
-    all_stock_data = []
+    # Results are stored column-wise, one pre-allocated array per column
+    columns = allocate_columns(len(symbols))
+    fetched = np.zeros(len(symbols), dtype=bool)
+    symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+    stale_symbols = []
+    # Histories with indicators, kept for the detailed view
+    stock_histories = {}
     
     progress_bar = st.progress(0, text="Fetching data for Nifty 50 stocks...")
 
+    # Serve what we can from the shared cache and only fetch the rest from Yahoo
+    symbols_to_fetch = []
     for i, symbol in enumerate(symbols):
-        data, _ = get_stock_data(symbol)
+        data, hist = read_shared_stock_data(symbol)
         if data:
-            all_stock_data.append(data)
-        progress_bar.progress((i + 1) / len(symbols), text=f"Analyzing {symbol}...")
+            fill_row(columns, i, data)
+            fetched[i] = True
+            stock_histories[symbol] = hist
+        else:
+            symbols_to_fetch.append(symbol)
+    done = len(symbols) - len(symbols_to_fetch)
+
+    if symbols_to_fetch:
+        # The fundamental data requests run while the batched history download is in flight
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            infos_future = executor.submit(get_stock_infos, symbols_to_fetch)
+            # Only download histories that aren't already cached on disk for today
+            symbols_to_download = [symbol for symbol in symbols_to_fetch if not is_history_cached(symbol)]
+            bulk_history = None
+            if symbols_to_download:
+                try:
+                    bulk_history = get_all_histories(symbols_to_download)
+                except Exception:
+                    # Symbols without a history are handled like any other failed fetch below
+                    pass
+            try:
+                infos = infos_future.result()
+            except Exception:
+                # Missing symbols are treated as failed fetches below
+                infos = {}
+
+        # Indicators for all symbols are computed together in one pass
+        histories = {symbol: get_symbol_history(bulk_history, symbol) for symbol in symbols_to_fetch}
+        calculate_technical_indicators_batch(histories.values())
+
+        for symbol in symbols_to_fetch:
+            data, hist = get_stock_data(symbol, histories[symbol], infos.get(symbol))
+            if data:
+                write_shared_stock_data(symbol, data, hist)
+            else:
+                # Fall back to the last known data if Yahoo failed for this symbol
+                data, hist = read_shared_stock_data(symbol, stale=True)
+                if data:
+                    stale_symbols.append(data['Symbol'])
+            if data:
+                i = symbol_index[symbol]
+                fill_row(columns, i, data)
+                fetched[i] = True
+                stock_histories[symbol] = hist
+            done += 1
+            progress_bar.progress(done / len(symbols), text=f"Analyzing {symbol}...")
     
     progress_bar.empty()
 
-    if not all_stock_data:
+    if stale_symbols:
+        st.warning(f"Could not refresh data for {', '.join(stale_symbols)}. Showing the last cached values.")
+
+    if not fetched.any():
         st.error("Could not fetch data for any stocks. Please try again later.")
         st.session_state.analysis_run = False
     else:
-        df = pd.DataFrame(all_stock_data)
-        # Clean up data for analysis
-        numeric_cols = ['Current Price', 'P/E Ratio', 'P/B Ratio', 'Debt to Equity', 'ROE', 'Revenue Growth', 'Market Cap', 'SMA_50', 'SMA_200', 'RSI']
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        
+        # Columns are already typed, so they go straight into an Arrow table
         # Store results in session state to persist across reruns
-        st.session_state.results = df
+        st.session_state.results = pa.table({col: values[fetched] for col, values in columns.items()})
+        st.session_state.histories = stock_histories
         st.session_state.analysis_run = True
         st.session_state.strategy = analysis_strategy 
         if analysis_strategy == "Quality Investing":
@@ -148,7 +511,7 @@ if run_button:
 
 # --- Display Logic (runs if analysis has been performed) ---
 if st.session_state.analysis_run and st.session_state.results is not None:
-    df = st.session_state.results
+    table = st.session_state.results
     strategy = st.session_state.strategy
     
     st.subheader(f"Top Stocks based on {strategy} Strategy")
@@ -156,14 +519,15 @@ if st.session_state.analysis_run and st.session_state.results is not None:
     # --- NEW: Expander to show raw data for debugging filters ---
     with st.expander("View Raw Data for Filtering"):
         st.info("Use this table to see the actual data and set realistic filter criteria in the sidebar.")
+        # Only the columns shown here are converted to pandas
         if strategy == "Quality Investing":
-            st.dataframe(df[['Symbol', 'Debt to Equity', 'ROE']].sort_values(by='ROE', ascending=False))
+            st.dataframe(table.select(['Symbol', 'Debt to Equity', 'ROE']).to_pandas().sort_values(by='ROE', ascending=False))
         elif strategy == "Growth Investing":
-            st.dataframe(df[['Symbol', 'Revenue Growth']].sort_values(by='Revenue Growth', ascending=False))
+            st.dataframe(table.select(['Symbol', 'Revenue Growth']).to_pandas().sort_values(by='Revenue Growth', ascending=False))
         elif strategy == "Value Investing":
-            st.dataframe(df[['Symbol', 'P/E Ratio', 'P/B Ratio']].sort_values(by='P/E Ratio', ascending=True))
+            st.dataframe(table.select(['Symbol', 'P/E Ratio', 'P/B Ratio']).to_pandas().sort_values(by='P/E Ratio', ascending=True))
         else:
-            st.dataframe(df[['Symbol', 'Current Price', 'SMA_50', 'SMA_200', 'RSI']].sort_values(by='RSI', ascending=False))
+            st.dataframe(table.select(['Symbol', 'Current Price', 'SMA_50', 'SMA_200', 'RSI']).to_pandas().sort_values(by='RSI', ascending=False))
 
 
     # --- Apply selected strategy for filtering and sorting ---
@@ -175,13 +539,9 @@ if st.session_state.analysis_run and st.session_state.results is not None:
         - **Sorted by:** Return on Equity (descending).
         """)
         # Added a check to ensure the required columns exist and are not all null
-        if 'Debt to Equity' in df.columns and 'ROE' in df.columns:
-            filtered_df = df[
-                (df['Debt to Equity'].notna()) & (df['ROE'].notna()) &
-                (df['Debt to Equity'] < params['max_de']) & 
-                (df['ROE'] > params['min_roe'])
-            ].copy()
-            sorted_df = filtered_df.sort_values(by="ROE", ascending=False)
+        if 'Debt to Equity' in table.column_names and 'ROE' in table.column_names:
+            mask = pc.and_(pc.less(table['Debt to Equity'], params['max_de']), pc.greater(table['ROE'], params['min_roe']))
+            sorted_df = select_top(table, mask, 'ROE', ascending=False)
         else:
             sorted_df = pd.DataFrame() # Create empty dataframe if columns are missing
         
@@ -193,8 +553,7 @@ if st.session_state.analysis_run and st.session_state.results is not None:
         - **Criteria:** Revenue Growth > 15%.
         - **Sorted by:** Revenue Growth (descending).
         """)
-        filtered_df = df[df['Revenue Growth'] > 0.15].copy()
-        sorted_df = filtered_df.sort_values(by="Revenue Growth", ascending=False)
+        sorted_df = select_top(table, pc.greater(table['Revenue Growth'], 0.15), 'Revenue Growth', ascending=False)
         display_cols = ['Symbol', 'Company Name', 'Current Price', 'Revenue Growth', 'P/E Ratio', 'Market Cap']
     
     elif strategy == "Value Investing":
@@ -203,8 +562,10 @@ if st.session_state.analysis_run and st.session_state.results is not None:
         - **Criteria:** P/E Ratio < 25, P/B Ratio < 3.
         - **Sorted by:** P/E Ratio (ascending - lower is better).
         """)
-        filtered_df = df[(df['P/E Ratio'] < 25) & (df['P/E Ratio'] > 0) & (df['P/B Ratio'] < 3) & (df['P/B Ratio'] > 0)].copy()
-        sorted_df = filtered_df.sort_values(by="P/E Ratio", ascending=True)
+        pe = table['P/E Ratio']
+        pb = table['P/B Ratio']
+        mask = pc.and_(pc.and_(pc.less(pe, 25), pc.greater(pe, 0)), pc.and_(pc.less(pb, 3), pc.greater(pb, 0)))
+        sorted_df = select_top(table, mask, 'P/E Ratio', ascending=True)
         display_cols = ['Symbol', 'Company Name', 'Current Price', 'P/E Ratio', 'P/B Ratio', 'Debt to Equity', 'Market Cap']
 
     elif strategy == "Technical Momentum":
@@ -213,12 +574,11 @@ if st.session_state.analysis_run and st.session_state.results is not None:
         - **Criteria:** Current Price > 50-Day SMA, 50-Day SMA > 200-Day SMA, RSI < 75 (to avoid extremely overbought).
         - **Sorted by:** RSI (descending - higher indicates stronger momentum).
         """)
-        filtered_df = df[
-            (df['Current Price'] > df['SMA_50']) & 
-            (df['SMA_50'] > df['SMA_200']) & 
-            (df['RSI'] < 75)
-        ].copy()
-        sorted_df = filtered_df.sort_values(by="RSI", ascending=False)
+        mask = pc.and_(
+            pc.and_(pc.greater(table['Current Price'], table['SMA_50']), pc.greater(table['SMA_50'], table['SMA_200'])),
+            pc.less(table['RSI'], 75)
+        )
+        sorted_df = select_top(table, mask, 'RSI', ascending=False)
         display_cols = ['Symbol', 'Company Name', 'Current Price', 'RSI', 'SMA_50', 'SMA_200']
 
     # --- Display Results ---
@@ -227,12 +587,15 @@ if st.session_state.analysis_run and st.session_state.results is not None:
     else:
         # Format numbers for better readability
         display_df = sorted_df.copy()
-        display_df['Market Cap'] = display_df['Market Cap'].apply(lambda x: f"₹{x/1e7:,.2f} Cr" if pd.notnull(x) else 'N/A')
+        mc_cr = display_df['Market Cap'].to_numpy(dtype=float) / 1e7
+        mc_text = np.char.add(np.char.add('₹', format_thousands(mc_cr).astype(str)), ' Cr')
+        display_df['Market Cap'] = np.where(np.isnan(mc_cr), 'N/A', mc_text)
         for col in ['ROE', 'Revenue Growth']:
              if col in display_df.columns:
-                display_df[col] = display_df[col].apply(lambda x: f"{x*100:.2f}%" if pd.notnull(x) else 'N/A')
+                vals = display_df[col].to_numpy(dtype=float) * 100
+                display_df[col] = np.where(np.isnan(vals), 'N/A', np.char.add(np.char.mod('%.2f', vals), '%'))
         
-        st.dataframe(display_df[display_cols].reset_index(drop=True).head(15))
+        st.dataframe(display_df[display_cols].reset_index(drop=True))
 
         # --- Detailed View Expander ---
         st.subheader("Detailed Stock View")
@@ -243,9 +606,11 @@ if st.session_state.analysis_run and st.session_state.results is not None:
 
         if selected_stock_symbol:
             full_symbol = selected_stock_symbol + ".NS"
-            data, hist = get_stock_data(full_symbol)
+            # Reuse the data collected during the analysis run instead of fetching it again
+            data = sorted_df[sorted_df['Symbol'] == selected_stock_symbol].iloc[0]
+            hist = st.session_state.histories.get(full_symbol)
             
-            if data and not hist.empty:
+            if hist is not None and not hist.empty:
                 st.write(f"### {data['Company Name']} ({data['Symbol']})")
                 
                 # Display charts in columns
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pandas as pd
+import yfinance as yf
+
+# Use a user-agent to avoid being blocked
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+QUOTE_SUMMARY_URL = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/{symbol}"
+# Only the fields used in the analysis, mapped to the quoteSummary module that holds them
+QUOTE_SUMMARY_FIELDS = {
+    'longName': 'price',
+    'currentPrice': 'financialData',
+    'trailingPE': 'summaryDetail',
+    'priceToBook': 'defaultKeyStatistics',
+    'debtToEquity': 'financialData',
+    'returnOnEquity': 'financialData',
+    'revenueGrowth': 'financialData',
+    'fiftyTwoWeekHigh': 'summaryDetail',
+    'fiftyTwoWeekLow': 'summaryDetail',
+    'marketCap': 'price',
+}
+
+def parse_quote_summary(result):
+    """Extracts the analysis fields from a quoteSummary result, keyed like yfinance's info."""
+    info = {}
+    for field, module in QUOTE_SUMMARY_FIELDS.items():
+        value = (result.get(module) or {}).get(field)
+        # Numeric fields come wrapped as {'raw': ..., 'fmt': ...}
+        if isinstance(value, dict):
+            value = value.get('raw')
+        if value is not None:
+            info[field] = value
+    return info
+
+# Stay under Yahoo's rate limit: 5 requests per second with bursts of up to 10
+YAHOO_RATE_PER_SECOND = 5
+YAHOO_BURST = 10
+YAHOO_MAX_RETRIES = 3
+# yf.download fetches each ticker's chart in its own thread, so bound how many run at once
+YAHOO_HISTORY_THREADS = 4
+
+class TokenBucket:
+    """
+    Limits async callers to `rate` acquisitions per second, allowing bursts of up to `capacity`.
+    Uses a threading lock so one bucket can be shared by every asyncio.run event loop and script thread.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Takes a token, returning how many seconds the caller has to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Going negative queues the caller behind the tokens already reserved
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+# One bucket for the whole process, so concurrent runs share Yahoo's rate limit
+yahoo_bucket = TokenBucket(YAHOO_RATE_PER_SECOND, YAHOO_BURST)
+
+async def fetch_quote_summaries(symbols):
+    """
+    Fetches the fundamental data for all symbols concurrently over a shared connection pool.
+    """
+    limits = httpx.Limits(max_connections=10)
+    async with httpx.AsyncClient(http2=True, headers={'User-Agent': USER_AGENT}, limits=limits, timeout=10, follow_redirects=True) as client:
+        # Yahoo requires a session cookie plus a matching crumb on every request
+        await client.get("https://fc.yahoo.com")
+        crumb_response = await client.get("https://query2.finance.yahoo.com/v1/test/getcrumb")
+        crumb_response.raise_for_status()
+        params = {'modules': ','.join(sorted(set(QUOTE_SUMMARY_FIELDS.values()))), 'crumb': crumb_response.text}
+
+        async def fetch(symbol):
+            try:
+                for attempt in range(YAHOO_MAX_RETRIES + 1):
+                    await yahoo_bucket.acquire()
+                    response = await client.get(QUOTE_SUMMARY_URL.format(symbol=symbol), params=params)
+                    if response.status_code != 429 or attempt == YAHOO_MAX_RETRIES:
+                        break
+                    # Back off exponentially when Yahoo rate-limits us
+                    await asyncio.sleep(2 ** attempt)
+                response.raise_for_status()
+                return symbol, parse_quote_summary(response.json()['quoteSummary']['result'][0])
+            except Exception:
+                # Return None if there's any issue fetching data for a symbol
+                return symbol, None
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+    return dict(results)
+
+def _download_histories(symbols):
+    """Runs one batched yf.download, always returning columns grouped by ticker."""
+    history = yf.download(" ".join(symbols), period="1y", group_by='ticker', threads=YAHOO_HISTORY_THREADS, progress=False)
+    if not history.empty and not isinstance(history.columns, pd.MultiIndex):
+        # Older yfinance releases return flat columns for a single ticker
+        history = pd.concat({symbols[0]: history}, axis=1)
+    return history
+
+def _missing_histories(history, symbols):
+    """Returns the symbols that have no price data in a batched download."""
+    present = set(history.columns.get_level_values(0)) if isinstance(history.columns, pd.MultiIndex) else set()
+    return [symbol for symbol in symbols if symbol not in present or history[symbol].isna().all().all()]
+
+def _rate_limited(symbols):
+    """Returns the symbols that the last yf.download reported as rate-limited."""
+    # yfinance records each failed ticker's exception in shared._ERRORS instead of raising
+    errors = getattr(getattr(yf, 'shared', None), '_ERRORS', None) or {}
+    return [symbol for symbol in symbols if 'rate limit' in errors.get(symbol.upper(), '').lower()]
+
+def download_histories(symbols):
+    """
+    Downloads one year of price history for all symbols in a batched call.
+    yfinance reports rate-limited tickers as missing rather than raising, so those are retried with backoff.
+    Tickers missing for any other reason, such as delisted ones, are not retried.
+    """
+    history = _download_histories(symbols)
+    retry_symbols = _rate_limited(_missing_histories(history, symbols))
+    for attempt in range(YAHOO_MAX_RETRIES):
+        if not retry_symbols:
+            break
+        time.sleep(2 ** attempt)
+        retry = _download_histories(retry_symbols)
+        if not retry.empty:
+            if isinstance(history.columns, pd.MultiIndex):
+                present = [symbol for symbol in retry_symbols if symbol in history.columns.get_level_values(0)]
+                history = pd.concat([history.drop(columns=present, level=0), retry], axis=1)
+            else:
+                history = retry
+        retry_symbols = _rate_limited(_missing_histories(history, retry_symbols))
+    return history
+
+def get_stock_data(symbol, hist, info):
+    """
+    Combines fundamental and technical data for a given stock symbol.
+    Expects hist to already include the technical indicators.
+    """
+    if not info or hist.empty:
+        return None, None
+
+    # Prepare a dictionary with relevant data
+    data = {
+        'Symbol': symbol.replace('.NS', ''),
+        'Company Name': info.get('longName', 'N/A'),
+        'Current Price': info.get('currentPrice', 0),
+        'P/E Ratio': info.get('trailingPE', None),
+        'P/B Ratio': info.get('priceToBook', None),
+        'Debt to Equity': info.get('debtToEquity', None),
+        'ROE': info.get('returnOnEquity', None),
+        'Revenue Growth': info.get('revenueGrowth', None),
+        '52 Week High': info.get('fiftyTwoWeekHigh', 0),
+        '52 Week Low': info.get('fiftyTwoWeekLow', 0),
+        'Market Cap': info.get('marketCap', 0),
+        'SMA_50': hist['SMA_50'].iloc[-1],
+        'SMA_200': hist['SMA_200'].iloc[-1],
+        'RSI': hist['RSI'].iloc[-1],
+    }
+    return data, hist